@@ -1,12 +1,76 @@
 #!/usr/bin/env python3
 
+import hashlib
 import json
 import os
+import pickle
 import subprocess
 import sys
+import unicodedata
 import logging
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
 from pathlib import Path
-from typing import Dict, List, Optional
+from typing import Callable, Dict, List, Optional
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import pygit2
+except ImportError:
+    pygit2 = None
+
+CACHE_DIR = Path(os.environ.get("XDG_CACHE_HOME", Path.home() / ".cache")) / "git-tools"
+
+
+def _configure_logging(level: int = logging.INFO) -> None:
+    """Send log output to stdout. Also used to set up worker processes."""
+    logging.basicConfig(
+        level=level,
+        format='%(asctime)s - %(levelname)s - %(message)s',
+        handlers=[
+            logging.StreamHandler(sys.stdout)
+        ]
+    )
+
+
+class _BatchGit:
+    """A long-running git cat-file --batch process for reading several objects from one repository."""
+    
+    def __init__(self, repo_path: Path):
+        self.repo_path = repo_path
+        self.process = None
+    
+    def __enter__(self) -> "_BatchGit":
+        self.process = subprocess.Popen(
+            ['git', 'cat-file', '--batch'],
+            cwd=str(self.repo_path),
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL
+        )
+        return self
+    
+    def __exit__(self, *exc_info) -> None:
+        # Closing stdin tells git there are no more queries
+        self.process.stdin.close()
+        self.process.wait()
+        self.process.stdout.close()
+    
+    def read(self, name: str) -> Optional[tuple]:
+        """Read an object by name (e.g. 'HEAD' or '<sha>:<path>') and return (type, content), or None if missing."""
+        self.process.stdin.write(f"{name}\n".encode())
+        self.process.stdin.flush()
+        header = self.process.stdout.readline().decode().split()
+        if len(header) != 3:
+            # '<name> missing' or '<name> ambiguous'
+            return None
+        sha, obj_type, size = header
+        content = self.process.stdout.read(int(size))
+        self.process.stdout.read(1)  # trailing newline
+        return obj_type, content
 
 
 class GitTools:
@@ -14,44 +78,95 @@ class GitTools:
         """Initialise and configure"""
         self.config_file = config_file
         self.interactive = interactive
+        
+        # Setup logging
+        _configure_logging()
+        self.logger = logging.getLogger(__name__)
+        
         self.config = self._load_config()
         self.base_url = self.config.get("base_url", "")
         self.checkout_directory = Path(self.config.get("checkout_directory", "."))
         self.repositories = self.config.get("repositories", [])
+        self._exists_cache: Dict[str, bool] = {}
         
-        # Setup logging
-        logging.basicConfig(
-            level=logging.INFO,
-            format='%(asctime)s - %(levelname)s - %(message)s',
-            handlers=[
-                logging.StreamHandler(sys.stdout)
-            ]
-        )
-        self.logger = logging.getLogger(__name__)
+        # Several workers prompting for credentials on one terminal would interleave,
+        # so when running in parallel make missing credentials fail instead
+        self._command_env = None
+        if self._max_workers() > 1:
+            self._command_env = {**os.environ, "GIT_TERMINAL_PROMPT": "0"}
+        
+        self.use_pygit2 = self.config.get("use_pygit2", False)
+        if self.use_pygit2 and pygit2 is None:
+            self.logger.warning("use_pygit2 is set but pygit2 is not installed, using git instead")
+            self.use_pygit2 = False
         
+        # Work out every repository's path and URL once up front. Paths are also
+        # kept as a list indexed like self.repositories for the status loop
+        self._base_url_clean = self.base_url.rstrip('/')
+        self._paths = [self.checkout_directory / repo for repo in self.repositories]
+        self._repo_paths = dict(zip(self.repositories, self._paths))
+        self._repo_urls = {repo: f"{self._base_url_clean}/{repo}" for repo in self.repositories}
+        
+    def _config_cache_file(self) -> Path:
+        """Location of the parsed config cache for this config file."""
+        key = hashlib.sha1(os.path.abspath(self.config_file).encode()).hexdigest()[:16]
+        return CACHE_DIR / f"config-{key}.pkl"
+    
     def _load_config(self) -> Dict:
-        """Load config"""
+        """Load config, reusing the cached parse if the file hasn't changed"""
         try:
-            with open(self.config_file, 'r') as f:
-                return json.load(f)
+            stat = os.stat(self.config_file)
+        except FileNotFoundError:
+            self.logger.error(f"Configuration file {self.config_file} not found")
+            sys.exit(1)
+        key = (stat.st_mtime_ns, stat.st_size)
+        
+        cache_file = self._config_cache_file()
+        try:
+            with open(cache_file, 'rb') as f:
+                cached_key, config = pickle.load(f)
+            if cached_key == key:
+                return config
+        except Exception:
+            # Missing or unreadable cache, just parse the file
+            pass
+        
+        try:
+            with open(self.config_file, 'rb') as f:
+                data = f.read()
+            config = orjson.loads(data) if orjson else json.loads(data)
         except FileNotFoundError:
             self.logger.error(f"Configuration file {self.config_file} not found")
             sys.exit(1)
         except json.JSONDecodeError as e:
             self.logger.error(f"Invalid JSON in {self.config_file}: {e}")
             sys.exit(1)
+        
+        try:
+            cache_file.parent.mkdir(parents=True, exist_ok=True)
+            with open(cache_file, 'wb') as f:
+                pickle.dump((key, config), f)
+        except OSError:
+            pass
+        return config
     
-    def _run_command(self, command: List[str], cwd: Optional[str] = None) -> tuple:
-        """Runs a shell command and return (success, output, error)."""
+    def _run_command(self, command: List[str], cwd: Optional[str] = None, capture: bool = True) -> tuple:
+        """Runs a shell command and return (success, output, error). Output is discarded unless capture is set."""
         try:
             result = subprocess.run(
                 command,
                 cwd=cwd,
-                capture_output=True,
+                stdout=subprocess.PIPE if capture else subprocess.DEVNULL,
+                stderr=subprocess.PIPE,
+                env=self._command_env,
                 text=True,
                 timeout=300  # 5 minutes timeout
             )
-            return result.returncode == 0, result.stdout.strip(), result.stderr.strip()
+            output = result.stdout.strip() if capture else ""
+            error = result.stderr.strip()
+            if "terminal prompts disabled" in error:
+                error += "\nRun with --interactive to enter credentials"
+            return result.returncode == 0, output, error
         except subprocess.TimeoutExpired:
             return False, "", "Command timeout"
         except Exception as e:
@@ -73,20 +188,264 @@ class GitTools:
         except Exception as e:
             return False, "", str(e)
     
+    def _run_remote_command(self, command: List[str], cwd: Optional[str] = None) -> tuple:
+        """Run a command that talks to the remote, allowing credential prompts in interactive mode."""
+        if self.interactive:
+            return self._run_command_interactive(command, cwd=cwd)
+        # Only the error text is ever used from remote commands
+        return self._run_command(command, cwd=cwd, capture=False)
+    
     def _get_repo_url(self, repo_name: str) -> str:
-        """Construct the full repository URL."""
-        # Remove trailing slash from base_url if present
-        base = self.base_url.rstrip('/')
-        return f"{base}/{repo_name}"
+        """Get the full repository URL."""
+        url = self._repo_urls.get(repo_name)
+        return url if url is not None else f"{self._base_url_clean}/{repo_name}"
     
     def _repo_exists(self, repo_name: str) -> bool:
         """Check if repository directory exists and is a git repo."""
-        repo_path = self.checkout_directory / repo_name
-        return repo_path.exists() and (repo_path / '.git').exists()
+        if repo_name not in self._exists_cache:
+            # A single stat of .git answers both questions
+            try:
+                os.stat(self._get_repo_path(repo_name) / '.git')
+                self._exists_cache[repo_name] = True
+            except OSError:
+                self._exists_cache[repo_name] = False
+        return self._exists_cache[repo_name]
+    
+    def _fold_name(self, name: str) -> str:
+        """Normalise a file name so it matches on case- and normalisation-insensitive filesystems."""
+        return unicodedata.normalize('NFC', name).casefold()
+    
+    def _list_checkout_directory(self) -> set:
+        """Folded names of all directories directly inside the checkout directory."""
+        try:
+            with os.scandir(self.checkout_directory) as entries:
+                return {self._fold_name(entry.name) for entry in entries if entry.is_dir()}
+        except OSError:
+            return set()
+    
+    def _batch_check(self) -> bytearray:
+        """Check which configured repositories exist, returning a mask indexed like self.repositories."""
+        # One directory scan rules out missing repositories without a stat each
+        present = self._list_checkout_directory()
+        names = self.repositories
+        paths = self._paths
+        exists_cache = self._exists_cache
+        exists_mask = bytearray(len(names))
+        for i in range(len(names)):
+            repo = names[i]
+            exists = exists_cache.get(repo)
+            if exists is None:
+                exists = False
+                repo_parts = Path(repo).parts
+                # The scan only rules out plain names with no folded match in the
+                # checkout directory; anything else ('..', absolute, empty) needs the stat
+                if (not repo_parts or repo_parts[0] == '..' or Path(repo).anchor
+                        or self._fold_name(repo_parts[0]) in present):
+                    try:
+                        os.stat(os.path.join(paths[i], '.git'))
+                        exists = True
+                    except OSError:
+                        pass
+                exists_cache[repo] = exists
+            exists_mask[i] = exists
+        return exists_mask
     
     def _get_repo_path(self, repo_name: str) -> Path:
         """Get the full path to a repository."""
-        return self.checkout_directory / repo_name
+        path = self._repo_paths.get(repo_name)
+        return path if path is not None else self.checkout_directory / repo_name
+    
+    def _read_head_ref(self, repo_path: Path) -> Optional[str]:
+        """Read the current branch name straight from .git/HEAD, or None if detached/unreadable."""
+        try:
+            with open(repo_path / '.git' / 'HEAD', 'r') as f:
+                head = f.readline().strip()
+        except OSError:
+            # Missing, or .git is a file (worktrees and submodules)
+            return None
+        prefix = 'ref: refs/heads/'
+        return head[len(prefix):] if head.startswith(prefix) else None
+    
+    def _get_status_pygit2(self, repo_path: Path) -> Optional[Dict]:
+        """Get branch, dirty state and ahead/behind counts for a repository in-process with pygit2."""
+        try:
+            repo = pygit2.Repository(str(repo_path))
+            status = {"branch": "unknown", "dirty": False, "ahead": 0, "behind": 0}
+            status["dirty"] = any(flags != pygit2.GIT_STATUS_IGNORED for flags in repo.status().values())
+            if repo.head_is_detached:
+                status["branch"] = "(detached)"
+            elif repo.head_is_unborn:
+                status["branch"] = self._read_head_ref(repo_path) or "unknown"
+            else:
+                status["branch"] = repo.head.shorthand
+                upstream = repo.branches.local[status["branch"]].upstream
+                if upstream is not None:
+                    status["ahead"], status["behind"] = repo.ahead_behind(repo.head.target, upstream.target)
+            return status
+        except (pygit2.GitError, KeyError):
+            return None
+    
+    def _get_status(self, repo_path: Path) -> Optional[Dict]:
+        """Get branch, dirty state and ahead/behind counts for a repository from a single git call."""
+        if self.use_pygit2:
+            return self._get_status_pygit2(repo_path)
+        
+        # Point git straight at the repository so it skips discovery, and let it
+        # remember untracked directories between runs instead of rescanning them
+        success, output, error = self._run_command(
+            ['git', f"--git-dir={repo_path / '.git'}", f"--work-tree={repo_path}",
+             '-c', 'core.untrackedCache=true',
+             'status', '--porcelain=v2', '--branch'])
+        if not success:
+            return None
+        
+        status = {"branch": "unknown", "dirty": False, "ahead": 0, "behind": 0}
+        for line in output.splitlines():
+            if line.startswith('# branch.head '):
+                status["branch"] = line[len('# branch.head '):]
+            elif line.startswith('# branch.ab '):
+                ahead, behind = line[len('# branch.ab '):].split()
+                status["ahead"] = int(ahead)
+                status["behind"] = -int(behind)
+            elif not line.startswith('#'):
+                status["dirty"] = True
+        return status
+    
+    def _resolve_ref(self, repo_path: Path, ref: str) -> Optional[str]:
+        """Resolve a full ref name to a SHA from the loose ref or packed-refs, or None if not found."""
+        git_dir = repo_path / '.git'
+        try:
+            try:
+                with open(git_dir / ref, 'r') as f:
+                    return f.readline().strip()
+            except FileNotFoundError:
+                with open(git_dir / 'packed-refs', 'r') as f:
+                    for line in f:
+                        parts = line.split()
+                        if len(parts) == 2 and parts[1] == ref:
+                            return parts[0]
+        except OSError:
+            pass
+        return None
+    
+    def _read_head_sha(self, repo_path: Path) -> Optional[str]:
+        """Resolve HEAD to a commit SHA from the files in .git, or None if that isn't possible."""
+        try:
+            with open(repo_path / '.git' / 'HEAD', 'r') as f:
+                head = f.readline().strip()
+        except OSError:
+            return None
+        if not head.startswith('ref: '):
+            # Detached HEAD holds the SHA itself
+            return head
+        return self._resolve_ref(repo_path, head[len('ref: '):])
+    
+    def _is_no_checkout(self, repo_path: Path) -> bool:
+        """Check for a clone made with --no-checkout: it has commits but no index or working tree."""
+        return not (repo_path / '.git' / 'index').exists() and self._read_head_sha(repo_path) is not None
+    
+    def _last_commit_subject(self, batch: _BatchGit) -> Optional[str]:
+        """Get the subject line of the HEAD commit."""
+        commit = batch.read('HEAD')
+        if commit is None or commit[0] != 'commit':
+            return None
+        # The message follows the first blank line after the commit headers
+        message = commit[1].decode(errors='replace').split('\n\n', 1)
+        return message[1].split('\n', 1)[0] if len(message) == 2 else ""
+    
+    def _max_workers(self) -> int:
+        """Number of repositories to process at the same time."""
+        if self.interactive:
+            # Credential prompts need the terminal to themselves
+            return 1
+        max_jobs = self.config.get("max_jobs", 8)
+        return max(1, min(max_jobs, len(self.repositories)))
+    
+    def _create_executor(self) -> Executor:
+        """Create the pool that per-repository workers run on."""
+        max_workers = self._max_workers()
+        if self.config.get("use_processes", False) and not self.interactive:
+            # Keeps any in-process work in the workers off the main interpreter's GIL
+            return ProcessPoolExecutor(
+                max_workers=max_workers,
+                initializer=_configure_logging,
+                initargs=(logging.getLogger().level,)
+            )
+        return ThreadPoolExecutor(max_workers=max_workers)
+    
+    def _run_parallel(self, worker: Callable[[str], str]) -> List[str]:
+        """Run worker for every repository, overlapping their git processes, and return the results."""
+        # Workers mostly wait on git child processes, so a small pool gives
+        # the same overlap as an event loop without changing every call site
+        with self._create_executor() as executor:
+            return list(executor.map(worker, self.repositories))
+    
+    def _clone_command(self, repo_url: str, repo_path: Path) -> List[str]:
+        """Build the git clone command for a repository."""
+        # No auto gc or hooks while provisioning; -c only applies to this command
+        command = ['git', '-c', 'gc.auto=0', '-c', f"core.hooksPath={os.devnull}", 'clone']
+        if self.config.get("no_checkout", False):
+            command.append('--no-checkout')
+        depth = self.config.get("shallow_depth")
+        if depth:
+            command += ['--depth', str(depth), '--single-branch']
+        if self.config.get("recurse_submodules", False):
+            # Fetch submodules in parallel rather than one at a time
+            command += ['--recurse-submodules', '--jobs', str(self.config.get("submodule_jobs", 4))]
+        return command + [repo_url, str(repo_path)]
+    
+    def _clone_pygit2(self, repo_url: str, repo_path: Path) -> tuple:
+        """Clone a repository in-process with pygit2 and return (success, output, error)."""
+        kwargs = {}
+        depth = self.config.get("shallow_depth")
+        if depth:
+            kwargs["depth"] = depth
+        try:
+            pygit2.clone_repository(repo_url, str(repo_path), **kwargs)
+            return True, "", ""
+        except TypeError as e:
+            if not kwargs:
+                return False, "", str(e)
+            # pygit2 older than 1.13.3 has no depth argument
+            return self._run_remote_command(self._clone_command(repo_url, repo_path))
+        except pygit2.GitError as e:
+            if kwargs and "shallow fetch is not supported" in str(e):
+                # libgit2 can't make shallow clones of local paths or file:// URLs
+                return self._run_remote_command(self._clone_command(repo_url, repo_path))
+            return False, "", str(e)
+        except Exception as e:
+            return False, "", str(e)
+    
+    def _clone_one(self, repo: str) -> str:
+        """Clone a single repository and return 'cloned', 'skipped' or 'error'."""
+        self.logger.info(f"Processing repository: {repo}")
+        
+        if self._repo_exists(repo):
+            self.logger.info(f"Repository {repo} already exists, skipping")
+            return "skipped"
+        
+        repo_url = self._get_repo_url(repo)
+        repo_path = self._get_repo_path(repo)
+        self.logger.info(f"Cloning {repo_url} to {repo_path}")
+        
+        # pygit2 covers plain and shallow clones; anything else needs the git command
+        if (self.use_pygit2 and not self.interactive
+                and not self.config.get("recurse_submodules", False)
+                and not self.config.get("no_checkout", False)):
+            success, output, error = self._clone_pygit2(repo_url, repo_path)
+        else:
+            success, output, error = self._run_remote_command(self._clone_command(repo_url, repo_path))
+        
+        if success:
+            self.logger.info(f"Successfully cloned {repo}")
+            self._exists_cache.pop(repo, None)
+            return "cloned"
+        
+        if self.interactive:
+            self.logger.error(f"Failed to clone {repo}")
+        else:
+            self.logger.error(f"Failed to clone {repo}: {error}")
+        return "error"
     
     def clone_repositories(self) -> None:
         """Clone all repositories. Skip if already exists."""
@@ -96,87 +455,135 @@ class GitTools:
         # Ensure checkout directory exists
         self.checkout_directory.mkdir(parents=True, exist_ok=True)
         
-        success_count = 0
-        skip_count = 0
-        error_count = 0
+        # Clones are network bound, so run several at once
+        results = self._run_parallel(self._clone_one)
         
-        for repo in self.repositories:
-            self.logger.info(f"Processing repository: {repo}")
-            
-            if self._repo_exists(repo):
-                self.logger.info(f"Repository {repo} already exists, skipping")
-                skip_count += 1
-                continue
-            
-            repo_url = self._get_repo_url(repo)
-            repo_path = self._get_repo_path(repo)
-            self.logger.info(f"Cloning {repo_url} to {repo_path}")
-            
-            if self.interactive:
-                success, output, error = self._run_command_interactive(['git', 'clone', repo_url, str(repo_path)])
-            else:
-                success, output, error = self._run_command(['git', 'clone', repo_url, str(repo_path)])
-            
-            if success:
-                self.logger.info(f"Successfully cloned {repo}")
-                success_count += 1
-            else:
-                if self.interactive:
-                    self.logger.error(f"Failed to clone {repo}")
-                else:
-                    self.logger.error(f"Failed to clone {repo}: {error}")
-                error_count += 1
+        success_count = results.count("cloned")
+        skip_count = results.count("skipped")
+        error_count = results.count("error")
         
         self.logger.info(f"Clone operation completed: {success_count} cloned, {skip_count} skipped, {error_count} errors")
     
-    def update_repositories(self) -> None:
-        """Update all repositories by switching to main/master and pulling."""
-        self.logger.info(f"Starting update operation for {len(self.repositories)} repositories")
-        self.logger.info(f"Checkout directory: {self.checkout_directory}")
+    def _get_upstream(self, repo_path: Path, branch: str) -> Optional[tuple]:
+        """Get (remote, ref) that a branch tracks, from branch.<name>.remote/merge, or None."""
+        success, output, error = self._run_command(
+            ['git', 'for-each-ref', '--format=%(upstream:remotename) %(upstream:remoteref)',
+             f"refs/heads/{branch}"], cwd=str(repo_path))
+        parts = output.split()
+        return (parts[0], parts[1]) if success and len(parts) == 2 else None
+    
+    def _is_up_to_date(self, repo_path: Path, remote: str, ref: str) -> bool:
+        """Check whether HEAD already matches a ref on the remote, without fetching."""
+        local_sha = self._read_head_sha(repo_path)
+        if local_sha is None:
+            success, local_sha, error = self._run_command(['git', 'rev-parse', 'HEAD'], cwd=str(repo_path))
+            if not success:
+                return False
         
-        success_count = 0
-        error_count = 0
+        # ls-remote only lists refs, so it is much cheaper than a fetch negotiation
+        success, output, error = self._run_command(['git', 'ls-remote', remote, ref], cwd=str(repo_path))
+        return success and output.split('\t', 1)[0] == local_sha
+    
+    def _update_one(self, repo: str) -> str:
+        """Update a single repository and return 'updated', 'skipped' or 'error'."""
+        self.logger.info(f"Updating repository: {repo}")
         
-        for repo in self.repositories:
-            self.logger.info(f"Updating repository: {repo}")
-            
-            if not self._repo_exists(repo):
-                self.logger.warning(f"Repository {repo} does not exist, skipping")
-                continue
-            
-            repo_path = self._get_repo_path(repo)
-            
-            # Check if repo has uncommitted changes
-            success, output, error = self._run_command(['git', 'status', '--porcelain'], cwd=str(repo_path))
-            if success and output.strip():
-                self.logger.warning(f"Repository {repo} has uncommitted changes, skipping update")
-                error_count += 1
-                continue
-            # Switch to master branch
-            success, output, error = self._run_command(['git', 'checkout', 'master'], cwd=str(repo_path))
+        if not self._repo_exists(repo):
+            self.logger.warning(f"Repository {repo} does not exist, skipping")
+            return "skipped"
+        
+        repo_path = self._get_repo_path(repo)
+        
+        # no_checkout clones have nothing to switch or merge, just fetch
+        if self._is_no_checkout(repo_path):
+            success, output, error = self._run_remote_command(['git', 'fetch', '--prune'], cwd=str(repo_path))
+            if not success:
+                if self.interactive:
+                    self.logger.error(f"Failed to fetch latest changes for {repo}")
+                else:
+                    self.logger.error(f"Failed to fetch latest changes for {repo}: {error}")
+                return "error"
+            self.logger.info(f"Successfully updated {repo}")
+            return "updated"
+        
+        # Check if repo has uncommitted changes
+        success, output, error = self._run_command(['git', 'status', '--porcelain'], cwd=str(repo_path))
+        if success and output.strip():
+            self.logger.warning(f"Repository {repo} has uncommitted changes, skipping update")
+            return "error"
+        # Switch to master branch, unless HEAD already points at master/main
+        branch = self._read_head_ref(repo_path)
+        if branch not in ('master', 'main'):
+            branch = 'master'
+            success, output, error = self._run_command(['git', 'checkout', 'master'], cwd=str(repo_path), capture=False)
             if not success:
                 # Try 'main' if 'master' doesn't exist
-                success, output, error = self._run_command(['git', 'checkout', 'main'], cwd=str(repo_path))
+                branch = 'main'
+                success, output, error = self._run_command(['git', 'checkout', 'main'], cwd=str(repo_path), capture=False)
                 if not success:
                     self.logger.error(f"Failed to checkout master/main branch for {repo}: {error}")
-                    error_count += 1
-                    continue
+                    return "error"
+        
+        # Pull latest changes
+        depth = self.config.get("shallow_depth")
+        shallow = bool(depth) and (repo_path / '.git' / 'shallow').exists()
+        # Compare against whatever the update below would bring in
+        upstream = ('origin', f"refs/heads/{branch}") if shallow else self._get_upstream(repo_path, branch)
+        if not self.interactive and upstream and self._is_up_to_date(repo_path, *upstream):
+            self.logger.info(f"Repository {repo} is already up-to-date")
+            success = True
+        elif shallow:
+            # The reset below would drop local commits, so refuse like --ff-only does
+            success, output, error = self._run_command(
+                ['git', 'rev-list', '--count', f"origin/{branch}..HEAD"], cwd=str(repo_path))
+            if not success or output != '0':
+                reason = error if not success else f"{output} local commit(s) not on origin/{branch}"
+                self.logger.error(f"Failed to pull latest changes for {repo}: {reason}")
+                return "error"
+            # Keep shallow clones shallow instead of pulling in full history
+            success, output, error = self._run_remote_command(
+                ['git', 'fetch', '--depth', str(depth), 'origin', branch], cwd=str(repo_path))
+            if success:
+                success, output, error = self._run_command(
+                    ['git', 'reset', '--hard', f"origin/{branch}"], cwd=str(repo_path), capture=False)
+        else:
+            # Fetch then fast-forward, so a diverged branch fails instead of getting a merge commit
+            success, output, error = self._run_remote_command(['git', 'fetch', '--prune'], cwd=str(repo_path))
+            if success:
+                success, output, error = self._run_command(
+                    ['git', 'merge', '--ff-only', '@{upstream}'], cwd=str(repo_path), capture=False)
             
-            # Pull latest changes
+        if not success:
             if self.interactive:
-                success, output, error = self._run_command_interactive(['git', 'pull'], cwd=str(repo_path))
-            else:
-                success, output, error = self._run_command(['git', 'pull'], cwd=str(repo_path))
-                
-            if success:
-                self.logger.info(f"Successfully updated {repo}")
-                success_count += 1
+                self.logger.error(f"Failed to pull latest changes for {repo}")
             else:
+                self.logger.error(f"Failed to pull latest changes for {repo}: {error}")
+            return "error"
+        
+        if self.config.get("recurse_submodules", False):
+            command = ['git', 'submodule', 'update', '--init', '--recursive',
+                       f"--jobs={self.config.get('submodule_jobs', 4)}"]
+            success, output, error = self._run_remote_command(command, cwd=str(repo_path))
+            if not success:
                 if self.interactive:
-                    self.logger.error(f"Failed to pull latest changes for {repo}")
+                    self.logger.error(f"Failed to update submodules for {repo}")
                 else:
-                    self.logger.error(f"Failed to pull latest changes for {repo}: {error}")
-                error_count += 1
+                    self.logger.error(f"Failed to update submodules for {repo}: {error}")
+                return "error"
+        
+        self.logger.info(f"Successfully updated {repo}")
+        return "updated"
+    
+    def update_repositories(self) -> None:
+        """Update all repositories by switching to main/master and pulling."""
+        self.logger.info(f"Starting update operation for {len(self.repositories)} repositories")
+        self.logger.info(f"Checkout directory: {self.checkout_directory}")
+        
+        # Pulls are network bound, so run several at once
+        results = self._run_parallel(self._update_one)
+        
+        success_count = results.count("updated")
+        error_count = results.count("error")
         
         self.logger.info(f"Update operation completed: {success_count} updated, {error_count} errors")
     
@@ -187,20 +594,38 @@ class GitTools:
         self.logger.info(f"Checkout Directory: {self.checkout_directory}")
         self.logger.info("-" * 50)
         
-        for repo in self.repositories:
-            if self._repo_exists(repo):
-                repo_path = self._get_repo_path(repo)
+        exists_mask = self._batch_check()
+        names = self.repositories
+        paths = self._paths
+        
+        for i in range(len(names)):
+            repo = names[i]
+            if exists_mask[i]:
+                repo_path = paths[i]
+                
+                if self._is_no_checkout(repo_path):
+                    branch_info = self._read_head_ref(repo_path) or "(detached)"
+                    self.logger.info(f"{repo:<30} EXISTS (branch: {branch_info}, status: no checkout)")
+                    continue
                 
-                # Get current branch
-                success, branch, error = self._run_command(['git', 'branch', '--show-current'], cwd=str(repo_path))
-                branch_info = branch if success else "unknown"
+                # Get current branch, uncommitted changes and ahead/behind in one go
+                status = self._get_status(repo_path)
+                if status is None:
+                    self.logger.info(f"{repo:<30} EXISTS (branch: unknown, status: clean)")
+                    continue
                 
-                # Check for uncommitted changes
-                success, status, error = self._run_command(['git', 'status', '--porcelain'], cwd=str(repo_path))
-                has_changes = success and status.strip()
-                status_info = "dirty" if has_changes else "clean"
+                branch_info = status["branch"]
+                status_info = "dirty" if status["dirty"] else "clean"
+                if status["ahead"] or status["behind"]:
+                    status_info += f", ahead: {status['ahead']}, behind: {status['behind']}"
                 
                 self.logger.info(f"{repo:<30} EXISTS (branch: {branch_info}, status: {status_info})")
+                
+                if self.logger.isEnabledFor(logging.DEBUG):
+                    with _BatchGit(repo_path) as batch:
+                        subject = self._last_commit_subject(batch)
+                    if subject is not None:
+                        self.logger.debug(f"{'':<30} last commit: {subject}")
             else:
                 self.logger.info(f"{repo:<30} NOT FOUND")
 
@@ -270,13 +695,13 @@ def main():
     
     mode = args[0]
     
-    # Set logging level
-    if verbose:
-        logging.getLogger().setLevel(logging.DEBUG)
-    
     # Initialize manager with specified config file and interactive mode
     gittools = GitTools(config_file, interactive)
     
+    # Set logging level (after GitTools has configured logging)
+    if verbose:
+        logging.getLogger().setLevel(logging.DEBUG)
+    
     # Execute requested operation
     if mode == "clone":
         gittools.clone_repositories()